@@ -1,49 +1,142 @@
+import hashlib
+from datetime import date
+from pathlib import Path
+
 import streamlit as st
 import yfinance as yf
 import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
 
+CACHE_DIR = Path('.cache')  # Parquet copies of downloaded price data
+CACHE_FORMAT = 'close-v1'   # Bump when the layout of the cached frames changes
+MAX_PLOT_POINTS = 5000      # Line traces longer than this are downsampled for plotting
+DEFAULT_START = date(2022, 1, 1)  # Plain dates: no string parsing on each rerun
+DEFAULT_END = date(2023, 1, 1)
+
 # --- Core Trading Logic Functions ---
 
+@st.cache_data(ttl=3600, show_spinner=False)
 def fetch_data(ticker, start, end):
     """
-    Fetches historical stock data from Yahoo Finance.
+    Fetches historical stock data from Yahoo Finance, reusing a local parquet copy when one exists.
+    Failures raise instead of returning None, so st.cache_data does not keep them.
     """
-    try:
-        data = yf.download(ticker, start=start, end=end)
-        if data.empty:
-            st.error(f"No data found for {ticker}. It might be delisted or the ticker is incorrect.")
-            return None
-        return data
-    except Exception as e:
-        st.error(f"An error occurred while fetching data: {e}")
-        return None
+    key = hashlib.sha1(f"{CACHE_FORMAT}|{ticker}|{start}|{end}".encode()).hexdigest()
+    cache_path = CACHE_DIR / f"{key}.parquet"
+    # Ranges reaching today or later are still filling in, so only past ranges go to disk
+    use_disk_cache = pd.Timestamp(end).date() < date.today()
+    if use_disk_cache and cache_path.exists():
+        return pd.read_parquet(cache_path)
+    # Only Close is used downstream; flat columns keep data['Close'] a Series
+    data = yf.download(ticker, start=start, end=end, progress=False, auto_adjust=True,
+                       threads=True, multi_level_index=False)[['Close']]
+    if data.empty:
+        raise LookupError(f"No data found for {ticker}. It might be delisted or the ticker is incorrect.")
+    # float32 prices are plenty for SMA crossovers and halve the memory traffic
+    data['Close'] = data['Close'].astype(np.float32)
+    if use_disk_cache:
+        CACHE_DIR.mkdir(exist_ok=True)
+        data.to_parquet(cache_path)
+    return data
 
-def add_moving_averages(data, short_window, long_window):
+def prefix_sum(close):
     """
-    Adds short-term and long-term moving averages to the DataFrame.
+    Returns the cumulative sum of the close prices with a leading zero, accumulated in float64.
     """
-    data['SMA_Short'] = data['Close'].rolling(window=short_window, min_periods=1).mean()
-    data['SMA_Long'] = data['Close'].rolling(window=long_window, min_periods=1).mean()
-    return data
+    # float64 keeps the running sum from drifting on long float32 series
+    cs = np.empty(len(close) + 1)
+    cs[0] = 0.0
+    np.cumsum(close, dtype=np.float64, out=cs[1:])
+    return cs
 
-def generate_signals(data):
+def window_sum(cs, window):
     """
-    Generates trading signals based on the moving average crossover strategy.
+    Returns the trailing sum over at most `window` samples for every row, from a prefix sum.
     """
-    signals = pd.DataFrame(index=data.index)
-    signals['price'] = data['Close']
-    signals['SMA_Short'] = data['SMA_Short']
-    signals['SMA_Long'] = data['SMA_Long']
-    
-    # Generate signal: 1 when short > long, 0 otherwise
-    signals['signal'] = 0.0
-    signals['signal'] = np.where(signals['SMA_Short'] > signals['SMA_Long'], 1.0, 0.0)   
+    sums = cs[1:].copy()
+    # Rows before the first full window keep their running total
+    if window < len(sums):
+        sums[window:] -= cs[1:len(sums) - window + 1]
+    return sums
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def sma(close_bytes, window):
+    """
+    Computes a simple moving average over raw float32 close prices, cached per window.
+    """
+    close = np.frombuffer(close_bytes, dtype=np.float32)
+    n = len(close)
+    cs = prefix_sum(close)
+    # Ramp over the first window-1 rows to match rolling(min_periods=1)
+    head = cs[1:window] / np.arange(1, min(window, n + 1))
+    tail = (cs[window:] - cs[:-window]) / window
+    return np.concatenate([head, tail]).astype(np.float32)
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def crossover_signal(close_bytes, short_window, long_window):
+    """
+    Computes the int8 crossover signal (1 when short SMA > long SMA), cached per window pair.
+    """
+    close = np.frombuffer(close_bytes, dtype=np.float32)
+    # With window sums S and sample counts c, S_short / c_short > S_long / c_long
+    # <=> S_short * c_long > S_long * c_short, so the comparison needs no divisions
+    cs = prefix_sum(close)
+    counts = np.arange(1, len(close) + 1)
+    spread = (window_sum(cs, short_window) * np.minimum(counts, long_window)
+              - window_sum(cs, long_window) * np.minimum(counts, short_window))
+    return (spread > 0).astype(np.int8)
+
+def compute_signals(close, short_window, long_window):
+    """
+    Computes both SMAs, the crossover signal and the buy/sell masks as NumPy arrays.
+    """
+    # The SMAs are only needed for plotting; each window is cached on its own,
+    # so moving one slider reuses the other SMA
+    close_bytes = close.tobytes()
+    sma_short = sma(close_bytes, short_window)
+    sma_long = sma(close_bytes, long_window)
+    sig = crossover_signal(close_bytes, short_window, long_window)
     
-    # Find the exact crossover points
-    signals['positions'] = signals['signal'].diff()
-    return signals
+    # Find the exact crossover points: any change of the binary signal is a trade,
+    # a buy when the new signal is 1 and a sell when it is 0
+    change = np.empty_like(sig)
+    change[0] = 0
+    np.bitwise_xor(sig[1:], sig[:-1], out=change[1:])
+    buy = change & sig
+    sell = change & ~sig & 1
+    return {
+        'sma_short': sma_short,
+        'sma_long': sma_long,
+        'signal': sig,
+        'buy': buy.view(np.bool_),
+        'sell': sell.view(np.bool_),
+    }
+
+def downsample(x, y, max_points=MAX_PLOT_POINTS):
+    """
+    Strides a line trace down to about max_points points before it is sent to the browser.
+    """
+    if len(x) <= max_points:
+        return x, y
+    step = -(-len(x) // max_points)  # ceiling division
+    idx = np.arange(0, len(x), step)
+    # Always keep the latest sample so the lines end at the current price
+    if idx[-1] != len(x) - 1:
+        idx = np.append(idx, len(x) - 1)
+    return x.take(idx), y.take(idx)
+
+@st.cache_resource
+def base_layout(template='plotly_dark'):
+    """
+    Returns the static chart layout shared by every rerun.
+    """
+    return dict(
+        xaxis_title='Date',
+        yaxis_title='Price (USD)',
+        legend_title='Legend',
+        template=template # Use a dark theme
+    )
 
 # --- Streamlit Web App ---
 
@@ -55,8 +148,8 @@ st.caption('This app visualizes a simple moving average (SMA) crossover trading
 # --- Sidebar for User Inputs ---
 st.sidebar.header('⚙️ Configuration')
 ticker = st.sidebar.text_input('Ticker Symbol', 'AAPL').upper()
-start_date = st.sidebar.date_input('Start Date', pd.to_datetime('2022-01-01'))
-end_date = st.sidebar.date_input('End Date', pd.to_datetime('2023-01-01'))
+start_date = st.sidebar.date_input('Start Date', DEFAULT_START)
+end_date = st.sidebar.date_input('End Date', DEFAULT_END)
 short_window = st.sidebar.slider('Short SMA Window', 10, 200, 40, 5)
 long_window = st.sidebar.slider('Long SMA Window', 10, 200, 100, 5)
 
@@ -66,15 +159,23 @@ long_window = st.sidebar.slider('Long SMA Window', 10, 200, 100, 5)
 if long_window <= short_window:
     st.sidebar.error('Error: Long window must be greater than the short window.')
 else:
-    # 1. Fetch Data
-    data = fetch_data(ticker, start_date, end_date)
+    # 1. Fetch Data (failures are not cached, so the next rerun retries)
+    try:
+        data = fetch_data(ticker, start_date, end_date)
+    except LookupError as e:
+        st.error(str(e))
+        data = None
+    except Exception as e:
+        st.error(f"An error occurred while fetching data: {e}")
+        data = None
     
     if data is not None:
-        # 2. Add Moving Averages
-        data_with_ma = add_moving_averages(data, short_window, long_window)
-        
-        # 3. Generate Trading Signals
-        signals = generate_signals(data_with_ma)
+        # 2. Compute Moving Averages and Trading Signals (kept as arrays until display)
+        dates = data.index
+        close = data['Close'].to_numpy(dtype=np.float32)
+        signals = compute_signals(close, short_window, long_window)
+        buy_mask = signals['buy']
+        sell_mask = signals['sell']
         
         # --- Visualization ---
         st.subheader(f'Price and Trading Signals for {ticker}')
@@ -82,48 +183,45 @@ else:
         # Create an interactive Plotly chart
         fig = go.Figure()
 
-        # Add Close Price line
-        fig.add_trace(go.Scatter(x=data.index, y=data['Close'], mode='lines', name='Close Price', line=dict(color='skyblue')))
+        # Add Close Price line (line traces are downsampled; signal markers stay full resolution)
+        close_x, close_y = downsample(dates, close)
+        fig.add_trace(go.Scattergl(x=close_x, y=close_y, mode='lines', name='Close Price', line=dict(color='skyblue')))
         
         # Add Moving Averages
-        fig.add_trace(go.Scatter(x=signals.index, y=signals['SMA_Short'], mode='lines', name=f'SMA {short_window}', line=dict(color='orange')))
-        fig.add_trace(go.Scatter(x=signals.index, y=signals['SMA_Long'], mode='lines', name=f'SMA {long_window}', line=dict(color='purple')))
+        sma_short_x, sma_short_y = downsample(dates, signals['sma_short'])
+        sma_long_x, sma_long_y = downsample(dates, signals['sma_long'])
+        fig.add_trace(go.Scattergl(x=sma_short_x, y=sma_short_y, mode='lines', name=f'SMA {short_window}', line=dict(color='orange')))
+        fig.add_trace(go.Scattergl(x=sma_long_x, y=sma_long_y, mode='lines', name=f'SMA {long_window}', line=dict(color='purple')))
         
         # Add Buy Signals to the chart
-        buy_signals = signals[signals['positions'] == 1.0]
-        fig.add_trace(go.Scatter(
-            x=buy_signals.index, 
-            y=buy_signals['price'], 
+        fig.add_trace(go.Scattergl(
+            x=dates[buy_mask], 
+            y=close[buy_mask], 
             mode='markers', 
             name='Buy Signal', 
             marker=dict(symbol='triangle-up', color='green', size=12, line=dict(width=1, color='DarkSlateGrey'))
         ))
         
         # Add Sell Signals to the chart
-        sell_signals = signals[signals['positions'] == -1.0]
-        fig.add_trace(go.Scatter(
-            x=sell_signals.index, 
-            y=sell_signals['price'], 
+        fig.add_trace(go.Scattergl(
+            x=dates[sell_mask], 
+            y=close[sell_mask], 
             mode='markers', 
             name='Sell Signal',
             marker=dict(symbol='triangle-down', color='red', size=12, line=dict(width=1, color='DarkSlateGrey'))
         ))
 
         # Customize the layout
-        fig.update_layout(
-            title=f'{ticker} Trading Signals (SMA Crossover)',
-            xaxis_title='Date',
-            yaxis_title='Price (USD)',
-            legend_title='Legend',
-            template='plotly_dark' # Use a dark theme
-        )
+        fig.update_layout(**base_layout(), title=f'{ticker} Trading Signals (SMA Crossover)')
         
         st.plotly_chart(fig, use_container_width=True)
 
         # --- Display Trade Log ---
         st.subheader('Trade Log')
-        trade_log = signals[signals['positions'].isin([1.0, -1.0])].copy()
-        trade_log['Action'] = trade_log['positions'].apply(lambda x: 'BUY' if x == 1.0 else 'SELL')
-        trade_log = trade_log[['price', 'Action']]
-        trade_log.rename(columns={'price': 'Price at Signal'}, inplace=True)
+        # Positional indices of the k trades, so only those rows are gathered
+        trade_idx = np.flatnonzero(buy_mask | sell_mask)
+        trade_log = pd.DataFrame({
+            'Price at Signal': close.take(trade_idx),
+            'Action': np.where(buy_mask.take(trade_idx), 'BUY', 'SELL'),
+        }, index=dates.take(trade_idx))
         st.dataframe(trade_log)
\ No newline at end of file
@@ -1,6 +1,11 @@
+import hashlib
+from datetime import date
+from pathlib import Path
+
 import yfinance as yf
 import pandas as pd
 import numpy as np
+from numba import njit, prange, types
 
 # -- Configuration --
 TICKER = 'AAPL'         # Ticker symbol for the stock (e.g., Apple)
@@ -8,11 +13,18 @@ START_DATE = '2022-01-01' # Start date for historical data
 END_DATE = '2023-01-01'   # End date for historical data
 SHORT_WINDOW = 40         # Short-term moving average window
 LONG_WINDOW = 100         # Long-term moving average window
+WATCHLIST = ['AAPL', 'MSFT', 'GOOGL', 'AMZN'] # Tickers for the batch backtest
+CACHE_DIR = Path('.cache') # Parquet copies of downloaded price data
+CACHE_FORMAT = 'close-v1'  # Bump when the layout of the cached frames changes
 
 def fetch_data(ticker, start, end):
     """
     Fetches historical stock data from Yahoo Finance.
     
+    Downloads of ranges that end before today are stored as parquet files
+    in CACHE_DIR, keyed by (CACHE_FORMAT, ticker, start, end), so repeated
+    runs read from local disk.
+    
     Args:
         ticker (str): The stock ticker symbol.
         start (str): The start date in 'YYYY-MM-DD' format.
@@ -22,60 +34,121 @@ def fetch_data(ticker, start, end):
         pandas.DataFrame: A DataFrame containing the historical data,
                           or None if data fetching fails.
     """
+    key = hashlib.sha1(f"{CACHE_FORMAT}|{ticker}|{start}|{end}".encode()).hexdigest()
+    cache_path = CACHE_DIR / f"{key}.parquet"
+    # Ranges reaching today or later are still filling in, so only past ranges go to disk
+    use_disk_cache = pd.Timestamp(end).date() < date.today()
+    if use_disk_cache and cache_path.exists():
+        print(f"Loading cached data for {ticker} from {cache_path}...")
+        return pd.read_parquet(cache_path)
+    
     print(f"Fetching data for {ticker} from {start} to {end}...")
     try:
-        data = yf.download(ticker, start=start, end=end)
+        # Only Close is used downstream; flat columns keep data['Close'] a Series
+        data = yf.download(ticker, start=start, end=end, progress=False, auto_adjust=True,
+                           threads=True, multi_level_index=False)[['Close']]
         if data.empty:
             print(f"No data found for {ticker}. It might be delisted or the ticker is incorrect.")
             return None
+        # float32 prices are plenty for SMA crossovers and halve the memory traffic
+        data['Close'] = data['Close'].astype(np.float32)
+        if use_disk_cache:
+            CACHE_DIR.mkdir(exist_ok=True)
+            data.to_parquet(cache_path)
         print("Data fetched successfully.")
         return data
     except Exception as e:
         print(f"An error occurred while fetching data: {e}")
         return None
 
-def add_moving_averages(data, short_window, long_window):
+# Close arrays read back from the parquet cache are read-only, so the kernel accepts readonly input
+CLOSE_ARRAY_TYPE = types.Array(types.float32, 1, 'A', readonly=True)
+
+# The explicit signature compiles the kernel at import time instead of on the first call
+@njit(types.UniTuple(types.float64[:], 4)(CLOSE_ARRAY_TYPE, types.int64, types.int64), cache=True, nogil=True)
+def compute_strategy(close, short_window, long_window):
     """
-    Adds short-term and long-term moving averages to the DataFrame.
+    Computes both SMAs, the crossover signal and the positions in a single pass.
     
     Args:
-        data (pandas.DataFrame): The DataFrame with price data.
+        close (numpy.ndarray): The closing prices (float32; sums are kept in float64).
         short_window (int): The window size for the short-term SMA.
         long_window (int): The window size for the long-term SMA.
         
     Returns:
-        pandas.DataFrame: The DataFrame with 'SMA_Short' and 'SMA_Long' columns.
+        tuple: (sma_short, sma_long, signal, positions) as float64 arrays.
     """
-    print(f"Calculating moving averages (Short: {short_window}, Long: {long_window})...")
-    data['SMA_Short'] = data['Close'].rolling(window=short_window, min_periods=1).mean()
-    data['SMA_Long'] = data['Close'].rolling(window=long_window, min_periods=1).mean()
-    print("Moving averages calculated.")
-    return data
+    n = close.shape[0]
+    sma_short = np.empty(n)
+    sma_long = np.empty(n)
+    signal = np.empty(n)
+    positions = np.empty(n)
+    short_sum = 0.0
+    long_sum = 0.0
+    for i in range(n):
+        # Running window sums; the divisor ramps up to match rolling(min_periods=1)
+        short_sum += close[i]
+        if i >= short_window:
+            short_sum -= close[i - short_window]
+        long_sum += close[i]
+        if i >= long_window:
+            long_sum -= close[i - long_window]
+        sma_short[i] = short_sum / min(i + 1, short_window)
+        sma_long[i] = long_sum / min(i + 1, long_window)
+
+        signal[i] = 1.0 if sma_short[i] > sma_long[i] else 0.0
+        positions[i] = signal[i] - signal[i - 1] if i > 0 else 0.0
+    return sma_short, sma_long, signal, positions
 
-def generate_signals(data):
+@njit('UniTuple(float64[:, :], 4)(float32[:, :], int64, int64)', parallel=True, nogil=True, cache=True)
+def batch_strategy(closes, short_window, long_window):
     """
-    Generates trading signals based on the moving average crossover strategy.
+    Runs compute_strategy for every ticker of a close-price matrix in parallel.
     
     Args:
-        data (pandas.DataFrame): DataFrame with price data and moving averages.
+        closes (numpy.ndarray): float32 closing prices shaped (n_tickers, n_days).
+        short_window (int): The window size for the short-term SMA.
+        long_window (int): The window size for the long-term SMA.
         
     Returns:
-        pandas.DataFrame: The DataFrame with a 'Signal' column.
+        tuple: (sma_short, sma_long, signal, positions) as float64 arrays
+               shaped like closes.
+    """
+    n_tickers, n_days = closes.shape
+    sma_short = np.empty((n_tickers, n_days))
+    sma_long = np.empty((n_tickers, n_days))
+    signal = np.empty((n_tickers, n_days))
+    positions = np.empty((n_tickers, n_days))
+    # Tickers are independent, so each row runs on its own thread
+    for t in prange(n_tickers):
+        sma_short[t], sma_long[t], signal[t], positions[t] = compute_strategy(closes[t], short_window, long_window)
+    return sma_short, sma_long, signal, positions
+
+def generate_signals(data, short_window, long_window):
     """
-    print("Generating trading signals...")
-    # Create a new DataFrame for signals
-    signals = pd.DataFrame(index=data.index)
-    signals['price'] = data['Close']
-    signals['SMA_Short'] = data['SMA_Short']
-    signals['SMA_Long'] = data['SMA_Long']
+    Generates trading signals based on the moving average crossover strategy.
     
-    # Generate signal when short SMA crosses long SMA
-    # np.where is used for conditional logic
-    signals['signal'] = 0.0
-    signals['signal'] = np.where(signals['SMA_Short'] > signals['SMA_Long'], 1.0, 0.0)   
+    Args:
+        data (pandas.DataFrame): The DataFrame with price data.
+        short_window (int): The window size for the short-term SMA.
+        long_window (int): The window size for the long-term SMA.
+        
+    Returns:
+        pandas.DataFrame: A DataFrame with price, 'SMA_Short', 'SMA_Long',
+                          'signal' and 'positions' columns.
+    """
+    print(f"Generating trading signals (Short: {short_window}, Long: {long_window})...")
+    close = data['Close'].to_numpy(dtype=np.float32)
+    sma_short, sma_long, signal, positions = compute_strategy(close, short_window, long_window)
     
-    # Take the difference of the signals column to generate actual trading orders
-    signals['positions'] = signals['signal'].diff()
+    # Build the signals DataFrame once from the kernel outputs
+    signals = pd.DataFrame({
+        'price': close,
+        'SMA_Short': sma_short,
+        'SMA_Long': sma_long,
+        'signal': signal,
+        'positions': positions,
+    }, index=data.index)
     print("Signals generated.")
     return signals
 
@@ -88,12 +161,16 @@ def execute_trades(signals):
     """
     print("\n-- Executing Trades --")
     # A 'position' of 1 represents a buy signal, -1 represents a sell signal
-    for index, row in signals.iterrows():
-        if row['positions'] == 1.0:
-            print(f"{index.date()}: BUY signal at price ${row['price']:.2f}")
+    positions = signals['positions'].to_numpy()
+    prices = signals['price'].to_numpy()
+    # Only visit the rows where a crossover happened
+    mask = positions != 0.0
+    for index, price, side in zip(signals.index[mask], prices[mask], positions[mask]):
+        if side == 1.0:
+            print(f"{index.date()}: BUY signal at price ${price:.2f}")
             # In a real application, you would place a buy order here
-        elif row['positions'] == -1.0:
-            print(f"{index.date()}: SELL signal at price ${row['price']:.2f}")
+        else:
+            print(f"{index.date()}: SELL signal at price ${price:.2f}")
             # In a real application, you would place a sell order here
     print("\n-- Trade simulation complete --\n")
 
@@ -108,13 +185,10 @@ def run_strategy():
     if price_data is None:
         return
         
-    # 2. Add Moving Averages
-    price_data_with_ma = add_moving_averages(price_data, SHORT_WINDOW, LONG_WINDOW)
+    # 2. Generate Moving Averages and Trading Signals
+    trading_signals = generate_signals(price_data, SHORT_WINDOW, LONG_WINDOW)
     
-    # 3. Generate Trading Signals
-    trading_signals = generate_signals(price_data_with_ma)
-    
-    # 4. Execute Trades (Simulation)
+    # 3. Execute Trades (Simulation)
     execute_trades(trading_signals)
     
     # Optional: Display the first few rows of the signals DataFrame
@@ -124,6 +198,38 @@ def run_strategy():
     print(trading_signals[trading_signals['positions'] != 0].head())
 
 
+def run_watchlist(tickers):
+    """
+    Runs the strategy over several tickers at once and prints a summary per ticker.
+    
+    Args:
+        tickers (list): The stock ticker symbols to backtest.
+    """
+    # 1. Fetch Data and align every ticker on the common trading days
+    closes = {}
+    for ticker in tickers:
+        price_data = fetch_data(ticker, START_DATE, END_DATE)
+        if price_data is not None:
+            closes[ticker] = price_data['Close']
+    if not closes:
+        return
+    frame = pd.concat(closes, axis=1, join='inner')
+    tickers = list(closes)
+    
+    # 2. Generate Trading Signals for all tickers in one parallel kernel call
+    close_matrix = np.stack([frame[ticker].to_numpy(dtype=np.float32) for ticker in tickers])
+    _, _, signal, positions = batch_strategy(close_matrix, SHORT_WINDOW, LONG_WINDOW)
+    
+    # 3. Summarize
+    print("\n--- Watchlist Summary ---")
+    for row, ticker in enumerate(tickers):
+        buys = int((positions[row] == 1.0).sum())
+        sells = int((positions[row] == -1.0).sum())
+        state = 'LONG' if signal[row, -1] == 1.0 else 'FLAT'
+        print(f"{ticker}: {buys} buy / {sells} sell signals, currently {state}")
+
+
 if __name__ == "__main__":
     # Entry point of the script
-    run_strategy()
\ No newline at end of file
+    run_strategy()
+    run_watchlist(WATCHLIST)
\ No newline at end of file